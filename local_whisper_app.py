@@ -7,6 +7,14 @@ import datetime
 import time
 import warnings
 import shutil
+import wave
+import gc
+import types
+from collections import OrderedDict
+import subprocess
+import tempfile
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 # --- FIX FOR "NoneType object has no attribute write" ---
 # When running as a windowed GUI (no console), sys.stderr is None.
@@ -37,15 +45,285 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 os.environ["PATH"] += os.pathsep + application_path
+
+# Converted/downloaded models live next to the app so restarts reuse them
+MODEL_CACHE_DIR = os.path.join(application_path, "model_cache")
+
+# All backends expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+# Media extensions accepted into the queue (lowercase, with dot)
+VALID_EXTS = frozenset({'.mp4', '.mkv', '.mp3', '.wav', '.m4a', '.flac', '.avi', '.mov', '.webm'})
+# Loaded models kept in memory, so toggling back to a recent model is instant
+MODEL_CACHE_SIZE = 2
+# Resampled copy written next to the source so re-runs can skip ffmpeg
+AUDIO_CACHE_SUFFIX = ".whisper16k.wav"
+# On Windows, keep ffmpeg from opening console windows or competing with the inference thread
+FFMPEG_CREATIONFLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0) | getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)
+# Stop prefetching once this much decoded audio is waiting (~4.5 h of float32 PCM)
+PREFETCH_LIMIT_BYTES = 1 << 30
+# UI labels -> values the backends expect; dict order is the combobox order
+LANG_MAP = {"Auto-Detect": None, "English": "en", "Spanish": "es", "French": "fr", "German": "de",
+            "Italian": "it", "Japanese": "ja", "Chinese": "zh"}
+DEVICE_MAP = {"GPU (CUDA)": "cuda", "CPU": "cpu", "Intel NPU": "NPU", "Intel GPU": "GPU"}
+# Longest audio staged to the GPU whole; longer files keep the CPU mel so the
+# full-file STFT never competes with the model for VRAM
+GPU_STAGE_SAMPLES = 300 * SAMPLE_RATE
+# Decoded PCM kept in memory so retries and re-runs skip ffmpeg (~2.3 h of float32 audio)
+PCM_CACHE_LIMIT_BYTES = 512 << 20
+# 5-bit ggml builds for whisper.cpp: ~3x smaller than f16 and faster on CPU
+GGML_QUANTIZED = {
+    "tiny": "tiny-q5_1",
+    "base": "base-q5_1",
+    "small": "small-q5_1",
+    "medium": "medium-q5_0",
+    "large": "large-v3-q5_0",
+    "large-v3": "large-v3-q5_0",
+}
 # -----------------------------------
 
 try:
-    import whisper
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
     import torch
 except ImportError:
-    whisper = None
     torch = None
 
+if torch and torch.cuda.is_available():
+    # Let Ampere+ tensor cores run the remaining fp32 matmuls/convolutions as TF32
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    # Input shapes are fixed (30 s windows), so cuDNN autotuning pays off after the first call
+    torch.backends.cudnn.benchmark = True
+
+try:
+    import whisper
+except ImportError:
+    whisper = None
+
+# Prefer the CTranslate2 backend; openai-whisper stays as the fallback
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+# Batched chunk decoding only ships with faster-whisper >= 1.1
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+# Optional int8 Linear layers for the openai-whisper backend on CUDA
+try:
+    import bitsandbytes as bnb
+except ImportError:
+    bnb = None
+
+# whisper.cpp bindings: hand-tuned SIMD kernels, used on CPU when installed
+try:
+    from pywhispercpp.model import Model as WhisperCppModel
+except ImportError:
+    WhisperCppModel = None
+
+# OpenVINO GenAI, for Intel NPUs and Intel GPUs
+try:
+    import openvino as ov
+    import openvino_genai as ov_genai
+    OPENVINO_DEVICES = {d.split(".")[0] for d in ov.Core().available_devices} & {"NPU", "GPU"}
+except Exception:
+    ov_genai = None
+    OPENVINO_DEVICES = set()
+
+# Optional TensorRT-LLM runtime. WhisperTRTLLM is the runner from TensorRT-LLM's
+# examples/whisper/run.py and convert_checkpoint.py builds its engines; neither
+# ships with the app, so the option stays hidden unless both are placed next to it
+try:
+    from whisper_trtllm import WhisperTRTLLM
+except ImportError:
+    WhisperTRTLLM = None
+if not os.path.isfile(os.path.join(application_path, "convert_checkpoint.py")):
+    WhisperTRTLLM = None
+
+def iter_files(folder):
+    # scandir hands back the entry type from the directory listing, so unlike
+    # os.walk nothing gets an extra stat() call. An explicit stack keeps deep
+    # trees clear of the recursion limit.
+    stack = [folder]
+    while stack:
+        subfolders = []
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subfolders.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path
+                    except OSError:
+                        pass
+        except OSError:
+            # Unreadable folders (permissions, vanished network shares) are skipped
+            pass
+        # Reversed so they pop in listing order, visiting folders in the same order as os.walk
+        stack.extend(reversed(subfolders))
+
+def format_timestamp(seconds, decimal_marker=','):
+    hours, milliseconds = divmod(round(seconds * 1000.0), 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1_000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def format_timestamps(seconds, decimal_marker=','):
+    if np is None:
+        return [format_timestamp(s, decimal_marker) for s in seconds]
+    # Split every timestamp into h/m/s/ms in one array pass
+    milliseconds = np.round(np.fromiter(seconds, dtype=np.float64) * 1000.0).astype(np.int64)
+    hours, milliseconds = np.divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = np.divmod(milliseconds, 60_000)
+    seconds, milliseconds = np.divmod(milliseconds, 1_000)
+    return [f"{h:02d}:{m:02d}:{s:02d}{decimal_marker}{ms:03d}"
+            for h, m, s, ms in zip(hours.tolist(), minutes.tolist(), seconds.tolist(), milliseconds.tolist())]
+
+
+def clean_text(text):
+    # Most segments only carry whisper's leading space and never contain "-->",
+    # so test before paying for the strip/replace copies
+    if text and (text[0].isspace() or text[-1].isspace()):
+        text = text.strip()
+    if '-->' in text:
+        # A literal arrow would be read as a cue timing line
+        text = text.replace('-->', '->')
+    return text
+
+
+class TranscriptWriter:
+    # Writes .srt/.vtt/.txt while segments are still being decoded. Segments are
+    # formatted in blocks so the timestamp maths stays vectorised. Output goes to
+    # .part files that replace the real ones only once the file finished cleanly,
+    # so a failed re-run never clobbers an earlier good transcript.
+    FLUSH_EVERY = 64
+
+    def __init__(self, output_base, srt=False, vtt=False, txt=False):
+        self.files = {}
+        self.paths = {}
+        self.pending = []
+        self.count = 0
+        try:
+            for ext, enabled in (("srt", srt), ("vtt", vtt), ("txt", txt)):
+                if enabled:
+                    self.paths[ext] = f"{output_base}.{ext}"
+                    # Binary, so each block is encoded in one call instead of through the text codec
+                    self.files[ext] = open(self.paths[ext] + ".part", "wb", buffering=1 << 20)
+        except OSError:
+            self.close(completed=False)
+            raise
+        if "vtt" in self.files:
+            self.write("vtt", "WEBVTT\n\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Also runs on errors, where the partial output is thrown away
+        self.close(completed=exc_type is None)
+
+    def add(self, segment):
+        self.pending.append(segment)
+        if len(self.pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        segments, self.pending = self.pending, []
+        if not segments:
+            return
+        # Cleaned once per segment and shared by the .srt and .vtt writers
+        texts = [clean_text(s["text"]) for s in segments]
+        if "srt" in self.files:
+            starts = format_timestamps((s["start"] for s in segments), decimal_marker=',')
+            ends = format_timestamps((s["end"] for s in segments), decimal_marker=',')
+            self.write("srt", "".join([f"{i}\n{start} --> {end}\n{text}\n\n"
+                                             for i, (start, end, text) in enumerate(zip(starts, ends, texts), start=self.count + 1)]))
+        if "vtt" in self.files:
+            starts = format_timestamps((s["start"] for s in segments), decimal_marker='.')
+            ends = format_timestamps((s["end"] for s in segments), decimal_marker='.')
+            self.write("vtt", "".join([f"{start} --> {end}\n{text}\n\n"
+                                             for start, end, text in zip(starts, ends, texts)]))
+        if "txt" in self.files:
+            self.write("txt", "".join([s["text"] for s in segments]))
+        self.count += len(segments)
+        # Hand each block to the OS so long files show up on disk as they progress
+        for f in self.files.values():
+            f.flush()
+
+    def write(self, ext, text):
+        if os.linesep != "\n":
+            # Same line endings text mode produced on Windows
+            text = text.replace("\n", os.linesep)
+        self.files[ext].write(text.encode("utf-8"))
+
+    def close(self, completed=True):
+        try:
+            if completed:
+                self.flush()
+        except Exception:
+            completed = False
+            raise
+        finally:
+            for f in self.files.values():
+                f.close()
+            for ext in self.files:
+                if completed:
+                    os.replace(self.paths[ext] + ".part", self.paths[ext])
+                elif os.path.exists(self.paths[ext] + ".part"):
+                    os.remove(self.paths[ext] + ".part")
+            self.files = {}
+
+
+class GuiProgressBar:
+    # Stands in for tqdm.tqdm inside whisper.transcribe, which advances its bar by
+    # audio frames as each 30 s window is decoded; the fraction goes to callback
+    callback = None
+
+    def __init__(self, total=None, **kwargs):
+        self.total = total or 0
+        self.n = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def update(self, n=1):
+        self.n += n
+        if self.total and GuiProgressBar.callback:
+            GuiProgressBar.callback(min(self.n / self.total, 1.0))
+
+
+def sdpa_qkv_attention(self, q, k, v, mask=None):
+    # Drop-in for whisper's MultiHeadAttention.qkv_attention: one fused kernel
+    # instead of materialising softmax(QK^T) in memory
+    n_batch, n_ctx, n_state = q.shape
+    q = q.view(*q.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+    k = k.view(*k.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+    v = v.view(*v.shape[:2], self.n_head, -1).permute(0, 2, 1, 3)
+    attn_mask = None
+    is_causal = False
+    if mask is not None and n_ctx > 1:
+        if k.shape[2] == n_ctx:
+            # whisper's mask is plain causal; saying so keeps SDPA on the FlashAttention
+            # kernel, which does not accept an explicit mask
+            is_causal = True
+        else:
+            # whisper's causal mask is additive -inf; SDPA wants True where attention is allowed
+            attn_mask = mask[:n_ctx, :n_ctx] == 0
+    out = torch.nn.functional.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask, is_causal=is_causal)
+    return out.permute(0, 2, 1, 3).flatten(start_dim=2), None
+
+
 class WhisperQueueApp:
     def __init__(self, root):
         self.root = root
@@ -54,17 +332,42 @@ class WhisperQueueApp:
         
         # State variables
         self.queue = []
+        self.queue_paths = set()
+        self.pending_rows = []
+        self.row_counter = 0
+        self.last_progress = None
         self.is_processing = False
         self.stop_event = threading.Event()
+        # Bounded so a chatty backend can't grow it without limit while Tk is busy
+        self.log_queue = queue.Queue(maxsize=5000)
+        self.status_queue = queue.Queue()
         self.model = None
-        self.current_model_name = None
+        self.model_cache = OrderedDict()
+        self.model_lock = threading.Lock()
+        self.pcm_cache = OrderedDict()
+        self.pcm_cache_bytes = 0
+        self.pcm_cache_lock = threading.Lock()
+        self.current_device = None
+        self.backend = None
+        self.compute_type = None
+        self.pipeline = None
+        self.pinned_audio = None
+        self.copy_stream = None
+        # Decoder threads are kept across runs and only rebuilt when the size changes
+        self.decoder_pool = None
+        self.decoder_workers = 0
+        self.prefetch_cancel = threading.Event()
+        # Running ffmpeg decodes, so closing the window can kill them
+        self.ffmpeg_procs = set()
+        self.ffmpeg_lock = threading.Lock()
         
         # Device detection
         self.has_gpu = torch and torch.cuda.is_available()
-        self.device_map = {"GPU (CUDA)": "cuda", "CPU": "cpu"}
         
         self.setup_ui()
         self.setup_drag_drop()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(100, self.flush_ui_updates)
         
         self.log(f"System ready. Application Path: {application_path}")
         
@@ -76,6 +379,9 @@ class WhisperQueueApp:
         # Check FFmpeg
         self.check_ffmpeg()
 
+        # Load the default model while the user is still picking files
+        self.start_preload()
+
     def check_ffmpeg(self):
         ffmpeg_path = os.path.join(application_path, "ffmpeg.exe")
         if os.path.exists(ffmpeg_path):
@@ -113,8 +419,9 @@ class WhisperQueueApp:
             self.log(f"Added {count} files via Drag & Drop.")
 
     def is_valid_file(self, filepath):
-        valid_exts = ('.mp4', '.mkv', '.mp3', '.wav', '.m4a', '.flac', '.avi', '.mov', '.webm')
-        return filepath.lower().endswith(valid_exts)
+        if filepath.endswith(AUDIO_CACHE_SUFFIX):
+            return False
+        return os.path.splitext(filepath)[1].lower() in VALID_EXTS
 
     def setup_ui(self):
         # --- Configuration ---
@@ -127,23 +434,55 @@ class WhisperQueueApp:
         models = ["tiny", "base", "small", "medium", "large", "large-v3"]
         self.model_combo = ttk.Combobox(control_frame, textvariable=self.model_var, values=models, state="readonly", width=10)
         self.model_combo.grid(row=0, column=1, padx=5, sticky="w")
+        self.model_combo.bind("<<ComboboxSelected>>", self.start_preload)
 
         ttk.Label(control_frame, text="Device:").grid(row=0, column=2, padx=5, sticky="w")
         self.device_var = tk.StringVar(value="GPU (CUDA)" if self.has_gpu else "CPU")
         device_options = ["GPU (CUDA)", "CPU"] if self.has_gpu else ["CPU"]
+        device_options += [name for name in ("Intel NPU", "Intel GPU") if DEVICE_MAP[name] in OPENVINO_DEVICES]
         self.device_combo = ttk.Combobox(control_frame, textvariable=self.device_var, values=device_options, state="readonly", width=12)
         self.device_combo.grid(row=0, column=3, padx=5, sticky="w")
+        self.device_combo.bind("<<ComboboxSelected>>", self.start_preload)
 
         ttk.Label(control_frame, text="Language:").grid(row=0, column=4, padx=5, sticky="w")
         self.lang_var = tk.StringVar(value="Auto-Detect")
-        langs = ["Auto-Detect", "English", "Spanish", "French", "German", "Italian", "Japanese", "Chinese"]
-        self.lang_combo = ttk.Combobox(control_frame, textvariable=self.lang_var, values=langs, state="readonly", width=15)
+        self.lang_combo = ttk.Combobox(control_frame, textvariable=self.lang_var, values=list(LANG_MAP), state="readonly", width=15)
         self.lang_combo.grid(row=0, column=5, padx=5, sticky="w")
 
         self.task_var = tk.StringVar(value="transcribe")
         self.task_combo = ttk.Combobox(control_frame, textvariable=self.task_var, values=["transcribe", "translate"], state="readonly", width=10)
         self.task_combo.grid(row=0, column=6, padx=5, sticky="w")
 
+        # Row 2
+        # Checkboxes that change which model is loaded; locked with the combos during a run
+        self.model_checks = []
+        self.use_trt = tk.BooleanVar(value=False)
+        if WhisperTRTLLM and self.has_gpu:
+            check = ttk.Checkbutton(control_frame, text="Use TensorRT engine", variable=self.use_trt, command=self.start_preload)
+            check.grid(row=1, column=0, columnspan=3, padx=5, pady=(10,0), sticky="w")
+            self.model_checks.append(check)
+        self.use_int8 = tk.BooleanVar(value=False)
+        self.int8_check = None
+        if whisper:
+            # Applies to openai-whisper only; faster-whisper quantizes through its compute type
+            self.int8_check = ttk.Checkbutton(control_frame, text="Use INT8 weights", variable=self.use_int8, command=self.start_preload)
+            self.int8_check.grid(row=1, column=3, columnspan=2, padx=5, pady=(10,0), sticky="w")
+            self.model_checks.append(self.int8_check)
+
+        # Each decode runs ffmpeg capped at 2 threads, so half the cores keeps the CPU busy
+        ttk.Label(control_frame, text="Concurrent decodes:").grid(row=1, column=5, padx=5, pady=(10,0), sticky="e")
+        self.decode_workers_var = tk.IntVar(value=max(1, (os.cpu_count() or 2) // 2))
+        ttk.Spinbox(control_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.decode_workers_var, width=4).grid(row=1, column=6, padx=5, pady=(10,0), sticky="w")
+
+        # Row 3
+        ttk.Label(control_frame, text="Backend:").grid(row=2, column=0, padx=5, pady=(10,0), sticky="w")
+        self.backend_var = tk.StringVar(value="Auto")
+        backends = ["Auto"] + [name for name, available in (("faster-whisper", WhisperModel), ("openai-whisper", whisper),
+                                                            ("whisper.cpp", WhisperCppModel)) if available]
+        self.backend_combo = ttk.Combobox(control_frame, textvariable=self.backend_var, values=backends, state="readonly", width=14)
+        self.backend_combo.grid(row=2, column=1, columnspan=2, padx=5, pady=(10,0), sticky="w")
+        self.backend_combo.bind("<<ComboboxSelected>>", self.start_preload)
+
         # --- Output Settings ---
         out_frame = ttk.LabelFrame(self.root, text="Output Settings", padding=10)
         out_frame.pack(fill="x", padx=10, pady=5)
@@ -166,10 +505,12 @@ class WhisperQueueApp:
         self.export_srt = tk.BooleanVar(value=True)
         self.export_vtt = tk.BooleanVar(value=False)
         self.export_txt = tk.BooleanVar(value=True)
+        self.cache_audio = tk.BooleanVar(value=True)
         
         ttk.Checkbutton(format_frame, text="Export .srt", variable=self.export_srt).pack(side="left", padx=10)
         ttk.Checkbutton(format_frame, text="Export .vtt", variable=self.export_vtt).pack(side="left", padx=10)
         ttk.Checkbutton(format_frame, text="Export .txt", variable=self.export_txt).pack(side="left", padx=10)
+        ttk.Checkbutton(format_frame, text="Cache resampled audio", variable=self.cache_audio).pack(side="left", padx=10)
 
         # --- Queue ---
         queue_frame = ttk.LabelFrame(self.root, text="File Queue (Drag & Drop Supported)", padding=10)
@@ -232,14 +573,44 @@ class WhisperQueueApp:
             self.output_path_var.set(folder)
 
     def log(self, message):
+        # Safe from any thread; flush_ui_updates writes it out on the Tk thread
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.log_box.config(state="normal")
-        self.log_box.insert("end", f"[{timestamp}] {message}\n")
-        self.log_box.see("end")
-        self.log_box.config(state="disabled")
+        try:
+            self.log_queue.put_nowait(f"[{timestamp}] {message}\n")
+        except queue.Full:
+            pass
+
+    def flush_ui_updates(self):
+        lines = []
+        while len(lines) < 200:
+            try:
+                lines.append(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            # One insert per tick instead of a redraw per message
+            self.log_box.config(state="normal")
+            self.log_box.insert("end", "".join(lines))
+            self.log_box.see("end")
+            self.log_box.config(state="disabled")
+
+        statuses = {}
+        while True:
+            try:
+                item_id, status = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            statuses[item_id] = status
+        for item_id, status in statuses.items():
+            # The row may have been cleared since the update was queued
+            if self.tree.exists(item_id):
+                self.tree.set(item_id, "status", status)
+                self.tree.see(item_id)
+
+        self.root.after(100, self.flush_ui_updates)
 
     def add_files(self):
-        filetypes = [("Media Files", "*.mp4 *.mkv *.mp3 *.wav *.m4a *.flac *.avi *.mov *.webm"), ("All Files", "*.*")]
+        filetypes = [("Media Files", " ".join("*" + ext for ext in sorted(VALID_EXTS))), ("All Files", "*.*")]
         files = filedialog.askopenfilenames(title="Select Media Files", filetypes=filetypes)
         for f in files:
             self.add_to_queue(f)
@@ -250,42 +621,61 @@ class WhisperQueueApp:
             self.add_folder_path(folder)
 
     def add_folder_path(self, folder):
-        for root_dir, _, files in os.walk(folder):
-            for file in files:
-                if self.is_valid_file(file):
-                    self.add_to_queue(os.path.join(root_dir, file))
+        for path in iter_files(folder):
+            if self.is_valid_file(path):
+                self.add_to_queue(path)
 
     def add_to_queue(self, path):
-        for item in self.queue:
-            if item['path'] == path:
-                return
-        filename = os.path.basename(path)
-        item_id = self.tree.insert("", "end", values=("Pending", filename, path))
+        if path in self.queue_paths:
+            return
+        self.queue_paths.add(path)
+        # The row id is ours, so the queue entry is usable before the row is drawn
+        self.row_counter += 1
+        item_id = f"row{self.row_counter}"
+        self.pending_rows.append((item_id, ("Pending", os.path.basename(path), path)))
         self.queue.append({"id": item_id, "path": path, "status": "Pending"})
+        if len(self.pending_rows) == 1:
+            # Insert the whole drop/folder in one idle pass, so Tk redraws once
+            self.root.after_idle(self.flush_pending_rows)
+
+    def flush_pending_rows(self):
+        rows, self.pending_rows = self.pending_rows, []
+        for item_id, values in rows:
+            self.tree.insert("", "end", iid=item_id, values=values)
+        self.update_queue_count()
+
+    def update_queue_count(self):
         self.lbl_count.config(text=f"Files in queue: {len(self.queue)}")
 
     def clear_queue(self):
         if self.is_processing:
             messagebox.showwarning("Busy", "Cannot clear queue while processing.")
             return
+        self.pending_rows = []
         self.tree.delete(*self.tree.get_children())
         self.queue = []
-        self.lbl_count.config(text="Files in queue: 0")
+        self.queue_paths.clear()
+        self.update_queue_count()
 
     def start_processing_thread(self):
         if not self.queue:
             messagebox.showinfo("Empty Queue", "Please add files to the queue first.")
             return
-        if not whisper:
+        if not whisper and not WhisperModel and not WhisperCppModel and not ov_genai:
             messagebox.showerror("Missing Libraries", "Whisper library not loaded.")
             return
             
+        self.flush_pending_rows()
         self.is_processing = True
         self.stop_event.clear()
+        self.last_progress = None
         self.btn_start.config(state="disabled")
         self.btn_stop.config(state="normal")
         self.model_combo.config(state="disabled")
         self.device_combo.config(state="disabled")
+        self.backend_combo.config(state="disabled")
+        for check in self.model_checks:
+            check.config(state="disabled")
         
         thread = threading.Thread(target=self.process_queue)
         thread.daemon = True
@@ -296,68 +686,584 @@ class WhisperQueueApp:
             self.stop_event.set()
             self.log("Stopping after current file...")
 
-    def process_queue(self):
+    def pick_compute_type(self, device):
+        if device != "cuda":
+            return "int8"
+        major = torch.cuda.get_device_capability(0)[0] if torch else 0
+        if major >= 8:
+            # Ampere+ tensor cores run int8 weights with fp16 activations
+            return "int8_float16"
+        if major == 7:
+            return "float16"
+        # Pre-Volta has no tensor cores and slow (or broken) fp16
+        return "float32"
+
+    def use_fp16(self):
+        return self.compute_type in ("float16", "int8_float16")
+
+    def resolve_backend(self, device, allow_trt=True):
+        # The backend load_model will use for this device with the current settings
+        # "Auto" prefers whisper.cpp on CPU and faster-whisper elsewhere
+        choice = self.backend_var.get()
+        if allow_trt and device == "cuda" and WhisperTRTLLM and whisper and self.use_trt.get():
+            return "tensorrt"
+        if device in ("NPU", "GPU"):
+            return "openvino"
+        if WhisperCppModel and (choice == "whisper.cpp" or (choice == "Auto" and device == "cpu")):
+            return "whisper.cpp"
+        if WhisperModel and (choice in ("Auto", "faster-whisper") or not whisper):
+            return "faster-whisper"
+        return "openai-whisper"
+
+    def load_model(self, model_size, device):
+        self.compute_type = self.pick_compute_type(device)
+        self.pipeline = None
+        backend = self.resolve_backend(device)
+        if backend == "tensorrt":
+            try:
+                model = self.load_trt_model(model_size)
+                self.backend = "tensorrt"
+                self.current_device = device
+                return model
+            except Exception as e:
+                self.log(f"TensorRT engine unavailable ({e}). Falling back to PyTorch...")
+                backend = self.resolve_backend(device, allow_trt=False)
+
+        if backend == "openvino":
+            self.backend = "openvino"
+            model = self.load_openvino_model(model_size, device)
+        elif backend == "whisper.cpp":
+            self.backend = "whisper.cpp"
+            self.log("Backend: whisper.cpp")
+            models_dir = os.path.join(MODEL_CACHE_DIR, "ggml")
+            os.makedirs(models_dir, exist_ok=True)
+            # whisper.cpp has no bare "large" alias
+            ggml_name = "large-v3" if model_size == "large" else model_size
+            try:
+                model = WhisperCppModel(GGML_QUANTIZED[model_size], models_dir=models_dir, n_threads=os.cpu_count())
+                self.log(f"Using quantized ggml weights ({GGML_QUANTIZED[model_size]}).")
+            except Exception as e:
+                self.log(f"Quantized ggml model unavailable ({e}). Using {ggml_name}...")
+                model = WhisperCppModel(ggml_name, models_dir=models_dir, n_threads=os.cpu_count())
+            # whisper.cpp manages its own threads and acceleration; skip the torch-side CUDA handling
+            device = "cpu"
+        elif backend == "faster-whisper":
+            self.backend = "faster-whisper"
+            self.log(f"Backend: faster-whisper ({self.compute_type})")
+            options = dict(device=device, compute_type=self.compute_type, cpu_threads=os.cpu_count(), download_root=MODEL_CACHE_DIR)
+            try:
+                # Reuse the cached CTranslate2 conversion without touching the network
+                model = WhisperModel(model_size, local_files_only=True, **options)
+            except Exception:
+                self.log("Model not cached yet, downloading...")
+                model = WhisperModel(model_size, **options)
+            if BatchedInferencePipeline and device == "cuda":
+                # Push VAD-split chunks through the encoder together instead of one window at a time
+                self.pipeline = BatchedInferencePipeline(model)
+                self.log("Batched inference enabled.")
+        else:
+            self.backend = "openai-whisper"
+            self.log(f"Backend: openai-whisper ({'float16' if self.use_fp16() else 'float32'})")
+            self.enable_sdpa()
+            # Only whisper's own module sees the substitute, the real tqdm is untouched
+            sys.modules["whisper.transcribe"].tqdm = types.SimpleNamespace(tqdm=GuiProgressBar)
+            model = None
+            if self.use_int8.get():
+                try:
+                    model = self.load_int8_model(model_size, device)
+                    self.log("INT8 weights enabled.")
+                except Exception as e:
+                    self.log(f"INT8 quantization failed ({e}). Using full-precision weights...")
+            if model is None:
+                model = self.load_whisper_model(model_size, device)
+                if device == "cuda":
+                    model = self.compile_model(model)
+        self.current_device = device
+        return model
+
+    def load_whisper_model(self, model_size, device):
+        # Memory-map the checkpoint instead of unpickling it into fresh buffers:
+        # pages fault in as they are copied and stay in the OS page cache, so
+        # the next launch starts warm
+        url = whisper._MODELS.get(model_size)
+        checkpoint_path = os.path.join(MODEL_CACHE_DIR, os.path.basename(url)) if url else None
+        if checkpoint_path and os.path.isfile(checkpoint_path):
+            try:
+                checkpoint = torch.load(checkpoint_path, map_location="cpu", mmap=True, weights_only=True)
+                model = whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint["dims"]))
+                # Copied rather than assigned: the checkpoint is fp16 and whisper expects
+                # fp32 parameters (it casts per layer when decoding in fp16). strict also
+                # rejects missing, unexpected or misshapen tensors while the fallback still applies
+                model.load_state_dict(checkpoint["model_state_dict"], strict=True)
+                model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_size])
+                return model.to(device)
+            except Exception as e:
+                # Older torch without mmap/assign, or a damaged file: whisper re-verifies it
+                self.log(f"Memory-mapped load failed ({e}). Loading normally...")
+        return whisper.load_model(model_size, device=device, download_root=MODEL_CACHE_DIR)
+
+    def enable_sdpa(self):
+        attention = whisper.model.MultiHeadAttention
+        if hasattr(attention, "use_sdpa"):
+            # Newer openai-whisper releases ship their own SDPA path
+            attention.use_sdpa = True
+        elif hasattr(torch.nn.functional, "scaled_dot_product_attention"):
+            attention.qkv_attention = sdpa_qkv_attention
+        else:
+            return
+        self.log("Scaled dot-product attention enabled.")
+
+    def load_int8_model(self, model_size, device):
+        # int8 Linear weights stream 2-4x fewer bytes per decoder step. Both paths
+        # start from plain CPU weights with no decode: quantize_dynamic works on the
+        # CPU module, and Int8Params quantizes as it moves to the GPU
+        model = self.load_whisper_model(model_size, "cpu")
+        if device == "cpu":
+            for module in model.modules():
+                # quantize_dynamic only matches exact nn.Linear; whisper's subclass just casts dtypes
+                if isinstance(module, whisper.model.Linear):
+                    module.__class__ = torch.nn.Linear
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif bnb:
+            self.swap_linear_int8(model)
+            model = model.to(device)
+        else:
+            raise RuntimeError("bitsandbytes is not installed")
+        # Make sure the quantized graph actually decodes before committing to it
+        self.probe_decode(model)
+        return model
+
+    def swap_linear_int8(self, module):
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear):
+                int8 = bnb.nn.Linear8bitLt(child.in_features, child.out_features, bias=child.bias is not None,
+                                           has_fp16_weights=False, threshold=6.0)
+                # Int8Params quantizes when the model is moved to the GPU
+                int8.weight = bnb.nn.Int8Params(child.weight.data.half(), requires_grad=False, has_fp16_weights=False)
+                if child.bias is not None:
+                    int8.bias = torch.nn.Parameter(child.bias.data.half(), requires_grad=False)
+                setattr(module, name, int8)
+            else:
+                self.swap_linear_int8(child)
+
+    def load_openvino_model(self, model_size, device):
+        model_dir = os.path.join(MODEL_CACHE_DIR, f"ov-{model_size}")
+        if not os.path.isdir(model_dir):
+            self.log("Converting model to OpenVINO (one-time, this can take several minutes)...")
+            # Export next to the target and rename, so an interrupted export is never picked up
+            subprocess.run(["optimum-cli", "export", "openvino", "--model", f"openai/whisper-{model_size}",
+                            "--weight-format", "int8", model_dir + ".tmp"], check=True, capture_output=True)
+            os.replace(model_dir + ".tmp", model_dir)
+        self.log(f"Backend: OpenVINO ({device})")
+        # CACHE_DIR keeps the compiled device blobs, skipping recompilation on later launches
+        return ov_genai.WhisperPipeline(model_dir, device, CACHE_DIR=os.path.join(MODEL_CACHE_DIR, "ov_cache"))
+
+    def load_trt_model(self, model_size):
+        engine_dir = os.path.join(MODEL_CACHE_DIR, "trtllm", f"{model_size}-fp16")
+        if not os.path.isdir(os.path.join(engine_dir, "decoder")):
+            self.log("Building TensorRT engine (one-time, this can take several minutes)...")
+            self.build_trt_engine(model_size, engine_dir)
+        self.log("Backend: TensorRT-LLM (float16)")
+        assets_dir = os.path.join(os.path.dirname(whisper.__file__), "assets")
+        return WhisperTRTLLM(engine_dir, assets_dir=assets_dir)
+
+    def build_trt_engine(self, model_size, engine_dir):
+        # Same steps as TensorRT-LLM's examples/whisper recipe
+        checkpoint_dir = engine_dir + "-checkpoint"
+        steps = [
+            [sys.executable, os.path.join(application_path, "convert_checkpoint.py"),
+             "--model_name", model_size, "--output_dir", checkpoint_dir],
+            ["trtllm-build", "--checkpoint_dir", os.path.join(checkpoint_dir, "encoder"),
+             "--output_dir", os.path.join(engine_dir, "encoder"), "--max_batch_size", "8",
+             "--bert_attention_plugin", "float16", "--gemm_plugin", "disable",
+             "--max_input_len", "3000", "--max_seq_len", "3000"],
+            ["trtllm-build", "--checkpoint_dir", os.path.join(checkpoint_dir, "decoder"),
+             "--output_dir", os.path.join(engine_dir, "decoder"), "--max_batch_size", "8",
+             "--gpt_attention_plugin", "float16", "--gemm_plugin", "float16",
+             "--max_input_len", "14", "--max_seq_len", "114", "--max_encoder_input_len", "3000"],
+        ]
+        for cmd in steps:
+            subprocess.run(cmd, check=True, capture_output=True)
+
+    def probe_decode(self, model):
+        # Same grad mode as transcribe_file: Dynamo guards on it, so a probe run with
+        # autograd on would compile graphs the real transcription never reuses
+        with torch.inference_mode():
+            model.transcribe(torch.zeros(SAMPLE_RATE), fp16=self.use_fp16(), language="en")
+
+    def compile_model(self, model):
+        encoder, decoder = model.encoder, model.decoder
+        # Whole-graph capture first; the decoder's kv-cache hooks usually force graph
+        # breaks though, so retry letting Dynamo split the graph before giving up
+        for fullgraph in (True, False):
+            try:
+                model.encoder = torch.compile(encoder, mode="reduce-overhead", fullgraph=fullgraph)
+                model.decoder = torch.compile(decoder, mode="reduce-overhead", fullgraph=fullgraph)
+                # Compilation is lazy: pay for it on a second of silence instead of the first queued file
+                self.probe_decode(model)
+                self.log(f"torch.compile enabled (fullgraph={fullgraph}).")
+                return model
+            except Exception as e:
+                # Keep the reason (e.g. the graph break) for diagnosis
+                reason = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+                self.log(f"torch.compile (fullgraph={fullgraph}) failed: {reason}")
+                model.encoder, model.decoder = encoder, decoder
+        self.log("Using eager mode.")
+        return model
+
+    def probe_duration(self, path):
+        cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+               "-of", "default=noprint_wrappers=1:nokey=1", path]
+        try:
+            return float(subprocess.run(cmd, capture_output=True, text=True, check=True,
+                                        creationflags=FFMPEG_CREATIONFLAGS).stdout.strip())
+        except (OSError, ValueError, subprocess.CalledProcessError):
+            # Unknown length, decode_audio grows its buffer as needed
+            return 0.0
+
+    def read_cached_audio(self, cache_path):
+        with wave.open(cache_path, "rb") as wav:
+            frames = wav.readframes(wav.getnframes())
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
+        audio /= 32768.0
+        return audio
+
+    def decode_audio(self, path, use_cache=False, cancel=None):
+        # Runs on decoder pool threads, hence the lock around the shared cache
+        try:
+            key = (path, os.path.getmtime(path))
+        except OSError:
+            key = None
+        with self.pcm_cache_lock:
+            audio = self.pcm_cache.get(key)
+            if audio is not None:
+                self.pcm_cache.move_to_end(key)
+                return audio
+
+        audio = self.extract_audio(path, use_cache, cancel)
+        if key is not None and audio.nbytes <= PCM_CACHE_LIMIT_BYTES:
+            with self.pcm_cache_lock:
+                if key not in self.pcm_cache:
+                    self.pcm_cache[key] = audio
+                    self.pcm_cache_bytes += audio.nbytes
+                while self.pcm_cache_bytes > PCM_CACHE_LIMIT_BYTES:
+                    _, evicted = self.pcm_cache.popitem(last=False)
+                    self.pcm_cache_bytes -= evicted.nbytes
+        return audio
+
+    def extract_audio(self, path, use_cache=False, cancel=None):
+        # Keyed on the full name, so talk.mp4 and talk.mkv in one folder get separate caches
+        cache_path = path + AUDIO_CACHE_SUFFIX
+        if use_cache:
+            if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                return self.read_cached_audio(cache_path)
+            # Read-only source folders just go without a cache
+            use_cache = os.access(os.path.dirname(cache_path) or ".", os.W_OK)
+
+        # Read ffmpeg's PCM output straight into one preallocated buffer instead of
+        # letting each backend collect stdout into intermediate bytes objects
+        buf = np.empty(int(self.probe_duration(path) * SAMPLE_RATE) + SAMPLE_RATE, dtype=np.int16)
+        view = memoryview(buf).cast("B")
+        filled = 0
+        cmd = ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-threads", "2", "-i", path,
+               "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"]
+        if use_cache:
+            # Second output from the same decode; renamed into place only once complete
+            cmd += ["-f", "wav", "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le", cache_path + ".part"]
+        # stderr goes to a file: a pipe nobody drains until EOF can fill up on a
+        # damaged input and leave ffmpeg and this reader waiting on each other
+        errors = tempfile.TemporaryFile()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors, bufsize=1 << 20,
+                                creationflags=FFMPEG_CREATIONFLAGS)
+        with self.ffmpeg_lock:
+            self.ffmpeg_procs.add(proc)
+        try:
+            with proc.stdout:
+                while True:
+                    if filled == len(view):
+                        grown = np.empty(len(buf) * 2, dtype=np.int16)
+                        grown[:len(buf)] = buf
+                        buf = grown
+                        view = memoryview(buf).cast("B")
+                    if cancel is not None and cancel.is_set():
+                        # Nobody is waiting for this file any more; stop burning CPU on it
+                        proc.kill()
+                        break
+                    # readinto1 returns after one pipe read; plain readinto waits for the whole
+                    # buffer to fill, which would only check cancel once per file
+                    n = proc.stdout.readinto1(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+            returncode = proc.wait()
+        finally:
+            with self.ffmpeg_lock:
+                self.ffmpeg_procs.discard(proc)
+        with errors:
+            # The last few lines are enough to say what went wrong
+            errors.seek(max(0, errors.seek(0, os.SEEK_END) - 4096))
+            error = errors.read().decode(errors="replace").strip()
+        if returncode != 0:
+            if cancel is not None and cancel.is_set():
+                error = "decode cancelled"
+            if use_cache and os.path.exists(cache_path + ".part"):
+                os.remove(cache_path + ".part")
+            raise RuntimeError(f"FFmpeg could not decode file: {error or returncode}")
+        if use_cache:
+            os.replace(cache_path + ".part", cache_path)
+
+        audio = buf[:filled // 2].astype(np.float32)
+        audio /= 32768.0
+        return audio
+
+    def prefetched_bytes(self, futures):
+        return sum(f.result().nbytes for f in futures.values() if f.done() and f.exception() is None)
+
+    def transcribe_file(self, audio, task, lang_code, vad_filter=True, progress=None):
+        # Yields segments as dicts of start/end/text; faster-whisper streams them
+        # as they are decoded, the other backends return them all at the end
+        if self.backend == "tensorrt":
+            return self.transcribe_trt(audio, task, lang_code)
+        if self.backend == "openvino":
+            options = {"task": task, "return_timestamps": True}
+            if lang_code:
+                options["language"] = f"<|{lang_code}|>"
+            result = self.model.generate(audio, **options)
+            duration = len(audio) / SAMPLE_RATE
+            # An unterminated final chunk reports end_ts as -1
+            return [{"start": c.start_ts, "end": c.end_ts if c.end_ts >= 0 else duration, "text": c.text}
+                    for c in result.chunks]
+        if self.backend == "whisper.cpp":
+            # Segment times come back in 10 ms ticks; the text is stripped, so put back
+            # the leading space the .txt output relies on between segments
+            result = self.model.transcribe(audio, language=lang_code or "auto", translate=(task == "translate"))
+            return [{"start": s.t0 / 100, "end": s.t1 / 100, "text": " " + s.text} for s in result]
+        if self.backend == "faster-whisper":
+            engine = self.pipeline or self.model
+            batch_options = {"batch_size": 16} if self.pipeline else {}
+            if self.pipeline and not vad_filter:
+                # The batched pipeline needs explicit chunks when VAD isn't splitting the audio
+                batch_options["clip_timestamps"] = [{"start": 0, "end": len(audio)}]
+            segments, info = engine.transcribe(audio, task=task, language=lang_code, vad_filter=vad_filter, beam_size=5, **batch_options)
+            return ({"start": s.start, "end": s.end, "text": s.text} for s in segments)
+
+        options = {"task": task}
+        if lang_code:
+            options["language"] = lang_code
+        if self.current_device == "cuda":
+            audio = self.stage_audio(audio)
+        # openai-whisper only hands segments back at the end, so report through its progress bar hook
+        GuiProgressBar.callback = progress
+        try:
+            # No autograd bookkeeping at all, not just no_grad
+            with torch.inference_mode():
+                result = self.model.transcribe(audio, fp16=self.use_fp16(), **options)
+        finally:
+            GuiProgressBar.callback = None
+        return result["segments"]
+
+    def stage_audio(self, audio):
+        # Upload through a reusable page-locked buffer so the copy is an async DMA;
+        # the mel spectrogram is then computed on the GPU as well
+        if audio.size > GPU_STAGE_SAMPLES:
+            # whisper then builds the mel on the host and uploads it per 30 s window
+            return audio
+        if self.pinned_audio is None:
+            # Fixed size, so one long file can't pin host memory for the rest of the session
+            self.pinned_audio = torch.empty(GPU_STAGE_SAMPLES, dtype=torch.float32, pin_memory=True)
+            self.copy_stream = torch.cuda.Stream()
+        self.copy_stream.synchronize()
+        staging = self.pinned_audio[:audio.size]
+        staging.copy_(torch.from_numpy(audio))
+        with torch.cuda.stream(self.copy_stream):
+            on_device = staging.to("cuda", non_blocking=True)
+        # Block the compute stream (not the host) until the upload lands
+        torch.cuda.current_stream().wait_stream(self.copy_stream)
+        on_device.record_stream(torch.cuda.current_stream())
+        return on_device
+
+    def transcribe_trt(self, audio, task, lang_code):
+        # The TensorRT-LLM runner decodes fixed 30 s windows without timestamps,
+        # so every window becomes one segment
+        if not lang_code:
+            self.log("TensorRT engine cannot auto-detect language, assuming English.")
+            lang_code = "en"
+        prefix = f"<|startoftranscript|><|{lang_code}|><|{task}|><|notimestamps|>"
+        audio = torch.from_numpy(audio)
+        window = whisper.audio.N_SAMPLES
+        batch_size = 8
+
+        segments = []
+        for batch_start in range(0, len(audio), window * batch_size):
+            offsets = range(batch_start, min(len(audio), batch_start + window * batch_size), window)
+            mels = [whisper.pad_or_trim(whisper.log_mel_spectrogram(audio[o:o + window], self.model.n_mels, device="cuda"), whisper.audio.N_FRAMES)
+                    for o in offsets]
+            mel = torch.stack(mels).half()
+            mel_lengths = torch.full((mel.shape[0],), whisper.audio.N_FRAMES, dtype=torch.int32, device="cuda")
+            texts = self.model.process_batch(mel, mel_lengths, text_prefix=prefix)
+            for o, text in zip(offsets, texts):
+                start = o / whisper.audio.SAMPLE_RATE
+                end = min(o + window, len(audio)) / whisper.audio.SAMPLE_RATE
+                segments.append({"start": start, "end": end, "text": " " + text.strip()})
+        return segments
+
+    def start_preload(self, event=None):
+        # A load now would swap the model out from under process_queue
+        if self.is_processing:
+            return
+        self.update_model_checks()
+        if not whisper and not WhisperModel and not WhisperCppModel and not ov_genai:
+            return
         model_size = self.model_var.get()
-        device_selection = self.device_combo.get()
-        target_device = self.device_map.get(device_selection, "cpu")
-        
-        if self.current_model_name != model_size or self.model is None:
+        target_device = DEVICE_MAP.get(self.device_var.get(), "cpu")
+        self.btn_start.config(state="disabled")
+        thread = threading.Thread(target=self.preload_model, args=(model_size, target_device))
+        thread.daemon = True
+        thread.start()
+
+    def preload_model(self, model_size, target_device):
+        self.ensure_model(model_size, target_device)
+        # Another selection change may have queued a newer load behind this one
+        if not self.is_processing and not self.model_lock.locked():
+            self.root.after(0, self.btn_start.config, {"state": "normal"})
+
+    def ensure_model(self, model_size, target_device):
+        # Serialised so the preloader and process_queue never load twice
+        with self.model_lock:
+            # Keyed on what will actually be loaded, so "Auto" and its explicit twin share an entry
+            backend = self.resolve_backend(target_device)
+            # INT8 only changes what openai-whisper loads; elsewhere it must not fork the cache
+            key = (model_size, target_device, backend, backend == "openai-whisper" and self.use_int8.get())
+            if key in self.model_cache:
+                self.model_cache.move_to_end(key)
+                self.activate_model(self.model_cache[key])
+                return True
+
+            # Make room before loading so the new model can reuse the freed memory
+            while len(self.model_cache) >= MODEL_CACHE_SIZE:
+                self.evict_model()
+
             self.log(f"Loading '{model_size}' on {target_device}...")
             self.log("Downloading model if not present (this may look stuck, please wait)...")
-            
+
             try:
-                self.model = whisper.load_model(model_size, device=target_device)
-                self.current_model_name = model_size
+                try:
+                    self.model = self.load_model(model_size, target_device)
+                except Exception as e:
+                    if not self.model_cache or "out of memory" not in str(e).lower():
+                        raise
+                    # Other cached models may be what is filling VRAM; drop them all and retry once
+                    self.log("Out of GPU memory. Unloading cached models and retrying...")
+                    while self.model_cache:
+                        self.evict_model()
+                    self.model = self.load_model(model_size, target_device)
                 self.log("Model loaded successfully.")
             except Exception as e:
                 # Fallback logic
-                if "CUDA" in str(e) or target_device == "cuda":
+                if "CUDA" in str(e) or target_device != "cpu":
                     self.log(f"GPU Error: {e}. Switching to CPU...")
                     try:
-                        self.model = whisper.load_model(model_size, device="cpu")
-                        self.current_model_name = model_size
+                        self.model = self.load_model(model_size, "cpu")
                         self.log("Model loaded on CPU.")
                     except Exception as e2:
                         self.log(f"CPU Load Error: {e2}")
-                        self.reset_ui()
-                        return
+                        return False
                 else:
                     self.log(f"Load Error: {e}")
-                    self.reset_ui()
-                    return
+                    return False
+            self.warm_up_model()
+            self.model_cache[key] = {"model": self.model, "backend": self.backend, "compute_type": self.compute_type,
+                                     "pipeline": self.pipeline, "device": self.current_device}
+            return True
+
+    def warm_up_model(self):
+        # cuDNN autotuning, torch.compile tracing and OpenVINO/TensorRT first-run setup
+        # land on 30 s of silence here instead of on the first queued file.
+        # Runs once per load; cached models come back already warm.
+        if self.current_device == "cpu":
+            return
+        self.log("Warming up the model...")
+        start_time = time.time()
+        try:
+            for _ in self.transcribe_file(np.zeros(30 * SAMPLE_RATE, dtype=np.float32), "transcribe", "en", vad_filter=False):
+                pass
+        except Exception as e:
+            self.log(f"Warm-up skipped ({e}).")
+            return
+        self.log(f"Warm-up finished in {time.time() - start_time:.2f}s")
+
+    def activate_model(self, entry):
+        self.model = entry["model"]
+        self.backend = entry["backend"]
+        self.compute_type = entry["compute_type"]
+        self.pipeline = entry["pipeline"]
+        self.current_device = entry["device"]
+
+    def evict_model(self):
+        key, entry = self.model_cache.popitem(last=False)
+        if entry["model"] is self.model:
+            self.model = None
+            self.pipeline = None
+        del entry
+        # Drop the last references before asking the CUDA allocator to give memory back
+        gc.collect()
+        if torch and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+            torch.cuda.ipc_collect()
+        self.log(f"Unloaded '{key[0]}' on {key[1]}.")
+
+    def process_queue(self):
+        model_size = self.model_var.get()
+        device_selection = self.device_combo.get()
+        target_device = DEVICE_MAP.get(device_selection, "cpu")
+
+        if not self.ensure_model(model_size, target_device):
+            self.root.after(0, self.reset_ui)
+            return
 
-        total = len(self.queue)
-        lang_setting = self.lang_var.get()
         task_setting = self.task_var.get()
-        
-        lang_code = None
-        if lang_setting != "Auto-Detect":
-            lang_map = {"English": "en", "Spanish": "es", "French": "fr", "German": "de", 
-                        "Italian": "it", "Japanese": "ja", "Chinese": "zh"}
-            lang_code = lang_map.get(lang_setting)
+        lang_code = LANG_MAP.get(self.lang_var.get())
+
+        # FFmpeg decodes upcoming files while the current one is being transcribed
+        queue_items = self.queue
+        pending = []
+        scanned = self.collect_pending(queue_items, pending, 0)
+        try:
+            workers = max(1, self.decode_workers_var.get())
+        except tk.TclError:
+            # Spinbox holds something that is not a number
+            workers = max(1, (os.cpu_count() or 2) // 2)
+        if self.decoder_pool is None or self.decoder_workers != workers:
+            if self.decoder_pool is not None:
+                self.decoder_pool.shutdown(wait=False)
+            self.decoder_pool = ThreadPoolExecutor(max_workers=workers)
+            self.decoder_workers = workers
+        futures = {}
+        next_submit = 0
+        cache_audio = self.cache_audio.get()
+        # Set once the loop exits, so in-flight prefetches kill their ffmpeg
+        prefetch_cancel = self.prefetch_cancel = threading.Event()
 
-        for index, item in enumerate(self.queue):
+        for position, (index, item) in enumerate(pending):
             if self.stop_event.is_set():
                 break
-            if item["status"] == "Done":
-                continue
 
+            while next_submit <= position or (next_submit < len(pending) and next_submit <= position + workers
+                                              and self.prefetched_bytes(futures) < PREFETCH_LIMIT_BYTES):
+                futures[next_submit] = self.decoder_pool.submit(self.decode_audio, pending[next_submit][1]["path"],
+                                                                cache_audio, prefetch_cancel)
+                next_submit += 1
+            future = futures.pop(position)
+
+            # Queue entries already Done when scanned, plus the ones this run got through
+            finished = scanned - len(pending) + position
             self.update_status(item["id"], "Processing...")
-            self.progress["value"] = (index / total) * 100
+            self.set_progress(finished / len(queue_items) * 100)
             file_path = item["path"]
             self.log(f"Transcribing: {os.path.basename(file_path)}")
 
             try:
-                start_time = time.time()
-                options = {"task": task_setting}
-                if lang_code:
-                    options["language"] = lang_code
-                
-                use_fp16 = (self.model.device.type == "cuda")
-                result = self.model.transcribe(file_path, fp16=use_fp16, **options)
-                
-                duration = time.time() - start_time
-                self.log(f"Finished in {duration:.2f}s")
+                audio = future.result()
 
                 base_name = os.path.splitext(os.path.basename(file_path))[0]
                 if self.use_source_folder.get():
@@ -372,13 +1278,23 @@ class WhisperQueueApp:
                     
                 output_base = os.path.join(output_dir, base_name)
 
-                if self.export_srt.get():
-                    self.write_srt(result["segments"], output_base + ".srt")
-                if self.export_vtt.get():
-                    self.write_vtt(result["segments"], output_base + ".vtt")
-                if self.export_txt.get():
-                    with open(output_base + ".txt", "w", encoding="utf-8") as f:
-                        f.write(result["text"])
+                start_time = time.time()
+                audio_duration = len(audio) / SAMPLE_RATE
+                # Move the bar within the file too, against the current queue length so files
+                # added mid-run rescale it; set_progress drops sub-percent steps
+                file_progress = lambda fraction, finished=finished: self.set_progress(
+                    (finished + fraction) / len(queue_items) * 100)
+                with TranscriptWriter(output_base, srt=self.export_srt.get(), vtt=self.export_vtt.get(),
+                                      txt=self.export_txt.get()) as writer:
+                    for segment in self.transcribe_file(audio, task_setting, lang_code, progress=file_progress):
+                        writer.add(segment)
+                        # openai-whisper already reported through its progress hook; replaying
+                        # its segments afterwards would pull the bar back
+                        if audio_duration and self.backend != "openai-whisper":
+                            file_progress(min(segment["end"] / audio_duration, 1.0))
+
+                duration = time.time() - start_time
+                self.log(f"Finished in {duration:.2f}s")
 
                 self.update_status(item["id"], "Done")
                 item["status"] = "Done"
@@ -388,9 +1304,37 @@ class WhisperQueueApp:
                 self.update_status(item["id"], "Error")
                 item["status"] = "Error"
 
-        self.progress["value"] = 100
+            # Files added during the run join its end; the for loop sees the appended entries
+            scanned = self.collect_pending(queue_items, pending, scanned)
+
+        # Drop decodes queued or running for files we are no longer going to process
+        prefetch_cancel.set()
+        for f in futures.values():
+            f.cancel()
+
+        self.set_progress(100)
         self.log("Processing complete.")
-        self.reset_ui()
+        self.root.after(0, self.reset_ui)
+
+    def collect_pending(self, items, pending, scanned):
+        # Appends queue entries past `scanned` that still need transcribing
+        while scanned < len(items):
+            if items[scanned]["status"] != "Done":
+                pending.append((scanned, items[scanned]))
+            scanned += 1
+        return scanned
+
+    def on_close(self):
+        # The decoder pool's threads are not daemons: a prefetch still running would
+        # keep the process alive after the window is gone
+        self.stop_event.set()
+        self.prefetch_cancel.set()
+        with self.ffmpeg_lock:
+            for proc in self.ffmpeg_procs:
+                proc.kill()
+        if self.decoder_pool is not None:
+            self.decoder_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
     def reset_ui(self):
         self.is_processing = False
@@ -398,38 +1342,26 @@ class WhisperQueueApp:
         self.btn_stop.config(state="disabled")
         self.model_combo.config(state="readonly")
         self.device_combo.config(state="readonly")
+        self.backend_combo.config(state="readonly")
+        self.update_model_checks()
+
+    def update_model_checks(self):
+        target_device = DEVICE_MAP.get(self.device_var.get(), "cpu")
+        for check in self.model_checks:
+            check.config(state="normal")
+        if self.int8_check and self.resolve_backend(target_device) != "openai-whisper":
+            # Only openai-whisper has an INT8 path; the others pick precision themselves
+            self.int8_check.config(state="disabled")
+
+    def set_progress(self, value):
+        # Worker-side: only hop to the Tk thread when the bar moves by a whole percent
+        value = int(value)
+        if value != self.last_progress:
+            self.last_progress = value
+            self.root.after(0, self.progress.configure, {"value": value})
 
     def update_status(self, item_id, status):
-        self.tree.set(item_id, "status", status)
-        self.tree.see(item_id)
-
-    def format_timestamp(self, seconds, always_include_hours=False, decimal_marker=','):
-        milliseconds = round(seconds * 1000.0)
-        hours = milliseconds // 3_600_000
-        milliseconds -= hours * 3_600_000
-        minutes = milliseconds // 60_000
-        milliseconds -= minutes * 60_000
-        seconds = milliseconds // 1_000
-        milliseconds -= seconds * 1_000
-        hours_marker = f"{hours:02d}:" if always_include_hours or hours > 0 else "00:"
-        return f"{hours_marker}{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
-
-    def write_srt(self, segments, path):
-        with open(path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(segments, start=1):
-                start = self.format_timestamp(segment["start"], always_include_hours=True, decimal_marker=',')
-                end = self.format_timestamp(segment["end"], always_include_hours=True, decimal_marker=',')
-                text = segment["text"].strip().replace('-->', '->')
-                f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
-
-    def write_vtt(self, segments, path):
-        with open(path, "w", encoding="utf-8") as f:
-            f.write("WEBVTT\n\n")
-            for segment in segments:
-                start = self.format_timestamp(segment["start"], decimal_marker='.')
-                end = self.format_timestamp(segment["end"], decimal_marker='.')
-                text = segment["text"].strip().replace('-->', '->')
-                f.write(f"{start} --> {end}\n{text}\n\n")
+        self.status_queue.put((item_id, status))
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore")